@@ -23,7 +23,7 @@
 #     with this program; if not, write to the Free Software Foundation, Inc.,
 #     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-import struct
+import ivlayout
 
 """Utility for extracting ballot data (votes) from iVotronic(TM)-style audit
 records in raw (.BIN) format.
@@ -34,7 +34,8 @@ summary totals per candidate.  (Candidate IDs start from 1 in the printed
 output, to match the text files output by official tabulation software.)
 
 Command-line usage:
-    $ python BallotLog.py <.BIN file>
+    $ python BallotLog.py <.BIN file> ...
+    (.zip/.tar.gz archives of .BIN files may be given instead)
 
 Example output:
     BALLOTS:
@@ -56,48 +57,27 @@ Programmatic usage:
 """
 
 class BallotLog:
-    # Format discovered by Bryce Eakin, Nov. 2006.
-    def __init__(self, machine_id):
+    # Format discovered by Bryce Eakin, Nov. 2006; see ivlayout.py.
+    def __init__(self, machine_id, layout=ivlayout.DEFAULT):
         self.ballots = None
         self.machine_id = machine_id
+        self.layout = layout
     
     def read_audit_file(self, fn):
-        fp = open(fn)
+        """Read the ballots from a memory image, given as a path or as a
+        seekable file object."""
+        if hasattr(fn, 'read'): fp = fn
+        else: fp = open(fn, 'rb')
+        region = self.layout.ballots
+        self.read_buf(region.read(fp), region.start)
+        if fp is not fn: fp.close()
 
-        ballots = []
-        
-        for bucket_pos in range(0x50000, 0x1f0000, 0x10000):
-            # 26 buckets offset by 0x10000 starting at 0x50000
-            #print "BUCKET: %08lx" % bucket_pos
-            fp.seek(bucket_pos)
-            while True:
-                len_raw = fp.read(2)
-                if len_raw == '\xff\xff': 
-                    # end of bucket; no more ballots
-                    break
-                # Record length (2 bytes): length of ballot (including the 2
-                # length bytes); this will include a lot of garbage in
-                # addition to individual votes
-                record_len = struct.unpack("<H", len_raw)[0]
-                #print "DEBUG: record_len = 0x%04x" % record_len
-                
-                # Extract the entire ballot record
-                rec_raw = fp.read(record_len - 2)
-                
-                # Number of votes in this ballot (the rest is junk)
-                num_votes = struct.unpack("<H", rec_raw[9:11])[0]
-                #print "DEBUG: num_votes = 0x%04x" % num_votes
-                
-                ballot = []
-                for i in range(0,num_votes):
-                    # Ballots contain 0-indexed candidate IDs.  Add 1 to get
-                    # the number printed alongside the candidate in the
-                    # IMAGELOG.
-                    ballot.append(
-                        struct.unpack("<H", rec_raw[11+2*i:11+2*i+2])[0])
-                ballots.append(ballot)
-
-        self.ballots = ballots
+    def read_buf(self, buf, base=0):
+        """Decode the ballots in buf, which holds the memory image starting
+        at file offset base (e.g. an entire image, with base 0)."""
+        # Ballots contain 0-indexed candidate IDs.  Add 1 to get the number
+        # printed alongside the candidate in the IMAGELOG.
+        self.ballots = list(self.layout.ballots.decode(buf, base))
 
     def __str__(self):
         # Not reproducing the entire IMAGELOG format yet since we're not
@@ -121,7 +101,15 @@ class BallotLog:
 
 if __name__ == '__main__':
     import sys, os
+    import ivarchive
     for fn in sys.argv[1:]:
+        if ivarchive.is_archive(fn):
+            for name, machine_id, events, ballots \
+            in ivarchive.decode_archive(fn):
+                bl = BallotLog(machine_id = machine_id)
+                bl.ballots = ballots
+                print str(bl)
+            continue
         machine_id = os.path.basename(fn)
         if len(machine_id) > 15:
             machine_id = '...' + machine_id[-12:]
@@ -0,0 +1,209 @@
+# ballotindex.py - part of the Rice iV Drip package
+# Copyright (C) 2026 agent
+#
+# AUTHORS:
+#     agent
+#     agent@local
+# VERSION:
+#     0.1
+# CREATED:
+#     2026-Oct-19
+# LICENSE:
+#     This program is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License along
+#     with this program; if not, write to the Free Software Foundation, Inc.,
+#     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Inverted index over decoded ballots (see BallotLog.py), for answering
+questions like "how many ballots voted for both candidates 12 and 40?" or
+"which ballots skipped this race?" across one or many machines without
+rescanning every ballot.
+
+Each candidate gets a posting list of the ballots that voted for it, which is
+turned into a bitset (a Python long; bit n is set if ballot n voted for the
+candidate) the first time it is queried.  Query results are bitsets too, so
+they can be combined further with &, | and ~ (mask with index.all()).
+
+Candidate IDs are the 0-indexed IDs stored in BallotLog.ballots; add 1 to
+get the number printed in the IMAGELOG.
+
+Command-line usage:
+    $ python ballotindex.py <cand>[,<cand>...] <.BIN file> ...
+    where the candidate numbers are given as printed (starting from 1).
+
+Programmatic usage:
+    index = BallotIndex()
+    index.add(bl)                       # ... for each BallotLog bl ...
+    both = index.having(11, 39)
+    print index.count(both), index.ballots_for(both)
+    skipped = index.lacking(*race_candidates)
+    matrix = index.covote([11, 39, 40])
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class BallotIndex:
+    def __init__(self):
+        self.ballots = []   # ballot number -> (machine_id, index on machine)
+        self.postings = {}  # candidate -> ascending list of ballot numbers
+        self._bits = {}     # candidate -> bitset, built on demand
+
+    def add(self, bl):
+        """Index every ballot in a BallotLog."""
+        self.add_ballots(bl.machine_id, bl.ballots)
+
+    def add_ballots(self, machine_id, ballots):
+        postings = self.postings
+        n = len(self.ballots)
+        for i in range(len(ballots)):
+            self.ballots.append((machine_id, i))
+            for vote in ballots[i]:
+                p = postings.get(vote)
+                if p is None:
+                    p = postings[vote] = []
+                if not p or p[-1] != n:
+                    p.append(n)
+                    self._bits.pop(vote, None)
+            n += 1
+
+    def candidates(self):
+        c = self.postings.keys()
+        c.sort()
+        return c
+
+    # ----- bitsets -----
+
+    def all(self):
+        """The bitset of every indexed ballot."""
+        return (1L << len(self.ballots)) - 1
+
+    def bits(self, cand):
+        """The bitset of ballots that voted for cand."""
+        b = self._bits.get(cand)
+        if b is None:
+            b = self._bits[cand] = to_bits(self.postings.get(cand, []))
+        return b
+
+    def count(self, bits):
+        return bin(bits).count('1')
+
+    def ballots_for(self, bits):
+        """The (machine_id, index on machine) of each ballot in bits."""
+        return [self.ballots[n] for n in from_bits(bits)]
+
+    # ----- queries -----
+
+    def having(self, *cands):
+        """Ballots that voted for all of cands (AND)."""
+        b = self.all()
+        for c in cands:
+            b &= self.bits(c)
+        return b
+
+    def having_any(self, *cands):
+        """Ballots that voted for at least one of cands (OR)."""
+        b = 0L
+        for c in cands:
+            b |= self.bits(c)
+        return b
+
+    def lacking(self, *cands):
+        """Ballots that voted for none of cands (NOT).  Pass every candidate
+        in a race to find the ballots that skipped that race."""
+        return self.all() & ~self.having_any(*cands)
+
+    def covote(self, cands=None):
+        """Co-occurrence matrix: covote(cands)[i][j] is the number of ballots
+        that voted for both cands[i] and cands[j] (the diagonal is each
+        candidate's total).  Uses NumPy if it is available."""
+        if cands is None:
+            cands = self.candidates()
+        if numpy is not None:
+            return self._covote_numpy(cands)
+        bits = [self.bits(c) for c in cands]
+        m = [[0] * len(cands) for c in cands]
+        for i in range(len(cands)):
+            for j in range(i, len(cands)):
+                m[i][j] = m[j][i] = self.count(bits[i] & bits[j])
+        return m
+
+    def _covote_numpy(self, cands, block=0x10000):
+        # ballots x candidates 0/1 matrix, multiplied by its transpose one
+        # block of ballots at a time to bound memory use
+        m = numpy.zeros((len(cands), len(cands)), numpy.int64)
+        postings = [numpy.array(self.postings.get(c, []), numpy.int64)
+                    for c in cands]
+        for lo in range(0, len(self.ballots), block):
+            hi = lo + block
+            a = numpy.zeros((min(hi, len(self.ballots)) - lo, len(cands)),
+                numpy.float32)
+            for j in range(len(cands)):
+                p = postings[j]
+                p = p[p.searchsorted(lo):p.searchsorted(hi)]
+                a[p - lo, j] = 1
+            m += numpy.dot(a.T, a).astype(numpy.int64)
+        return m.tolist()
+
+def to_bits(positions):
+    """Bitset (a long) with the given bit positions set."""
+    if not positions:
+        return 0L
+    buf = bytearray(positions[-1] // 8 + 1)
+    for p in positions:
+        buf[p >> 3] |= 1 << (p & 7)
+    buf.reverse()
+    return long(str(buf).encode('hex'), 16)
+
+def from_bits(bits):
+    """Ascending list of the bit positions set in bits."""
+    h = '%x' % bits
+    if len(h) % 2: h = '0' + h
+    buf = bytearray(h.decode('hex'))
+    buf.reverse()
+    positions = []
+    for i in range(len(buf)):
+        byte = buf[i]
+        if byte:
+            for bit in range(8):
+                if byte & (1 << bit):
+                    positions.append(8 * i + bit)
+    return positions
+
+if __name__ == '__main__':
+    import sys, os
+    from BallotLog import BallotLog
+    if len(sys.argv) < 3:
+        print "usage: ballotindex.py <cand>[,<cand>...] <.BIN file> ..."
+        sys.exit(1)
+    cands = [int(c) - 1 for c in sys.argv[1].split(',')]
+    index = BallotIndex()
+    for fn in sys.argv[2:]:
+        bl = BallotLog(machine_id = os.path.basename(fn))
+        bl.read_audit_file(fn)
+        index.add(bl)
+    print "Ballots indexed: %d" % len(index.ballots)
+    names = ' '.join(['#%d' % (1+c) for c in cands])
+    print "Voted for all of %s: %d" % (names, index.count(index.having(*cands)))
+    print "Voted for any of %s: %d" % (names,
+        index.count(index.having_any(*cands)))
+    print "Voted for none of %s: %d" % (names,
+        index.count(index.lacking(*cands)))
+    print
+    print "CO-VOTES:"
+    print "      " + ''.join(['%6s' % ('#%d' % (1+c)) for c in cands])
+    m = index.covote(cands)
+    for i in range(len(cands)):
+        print "%6s" % ('#%d' % (1+cands[i])) \
+            + ''.join(['%6d' % n for n in m[i]])
@@ -37,17 +37,24 @@ Command-line usage:
     where:
         <eventlog.txt>  : text tabulation of records
         <root-path>     : ancestor directory of *.BIN files to compare 
-                          against text tabulation
+                          against text tabulation (or a .zip/.tar.gz
+                          archive containing them)
+
+    $ python ieventlog.py -f <eventlog.txt> [<seconds>]
+    Follow mode: re-reads only the newly appended part of the text log every
+    <seconds> (default 10) and prints the running totals.
                           
 Programmatic usage: 
     log = EventLog()
     log.read_mem(open('VXXXXXXX.BIN', 'XXXXXXX'))
     log.write_report(sys.stdout)
     # ... log.events ... log.events_per_machine ...
+    log.write_report(sys.stdout, log.timeline(start, end)) # all machines
 """
 
 import re
 import time
+import heapq
 
 ## FORMAT:
 #Votronic  PEB#   Type    Date       Time     Event
@@ -72,6 +79,8 @@ g_event_codes = {}
 
 g_line_no = 0
 
+g_offset = 0 # bytes of the text event log consumed so far (see follow())
+
 events = []
 events_per_machine = {}
 events_per_peb = {}
@@ -79,8 +88,9 @@ events_per_code = {}
 
 def reset():
     global events, events_per_peb, events_per_machine, events_per_code, \
-        g_line_no, g_current_machine, g_current_peb, g_event_codes
+        g_line_no, g_offset, g_current_machine, g_current_peb, g_event_codes
     g_line_no = 0
+    g_offset = 0
     events = []
     events_per_machine = {}
     events_per_peb = {}
@@ -89,31 +99,45 @@ def reset():
     g_event_codes = {}
 
 # NEW: Code to analyze memory dumps.
-import struct
+import ivlayout
 TIMEBASE = 757404000 # 01/01/94 00:00:00
-EVENT_LEN = 10 # bytes
-EVENT_OFFSET = 0x30000
+EVENT_LEN = ivlayout.DEFAULT.events.record.size # bytes
+EVENT_OFFSET = ivlayout.DEFAULT.events.offset
 class EventLog:
-    def __init__(self):
+    def __init__(self, layout=ivlayout.DEFAULT):
         self.events = []
         self.events_per_machine = {}
-    def read_mem(self, fn, mach='(unknown)'):
-        fp = open(fn)
-        fp.seek(EVENT_OFFSET)
-        if not mach in self.events_per_machine:
-            self.events_per_machine[mach] = []
-        while True:
-            eventdata = fp.read(EVENT_LEN)
-            if ord(eventdata[0]) == 0xff: break
-            e = Event.new_from_buf(eventdata, mach)
-            self.events.append(e)
-            self.events_per_machine[mach].append(e)
-        fp.close()
-    def write_report(self, out):
+        self.layout = layout
+    def read_mem(self, fn, mach='(unknown)', key=None):
+        """Read the events from a memory image, given as a path or as a
+        seekable file object.  The events are filed in events_per_machine
+        under key (default: mach)."""
+        if hasattr(fn, 'read'): fp = fn
+        else: fp = open(fn, 'rb')
+        region = self.layout.events
+        self.read_buf(region.read(fp), mach, region.offset, key)
+        if fp is not fn: fp.close()
+    def read_buf(self, buf, mach='(unknown)', base=0, key=None):
+        """Decode the events in buf, which holds the memory image starting
+        at file offset base (e.g. an entire image, with base 0)."""
+        self.read_fields(self.layout.events.decode_all(buf, base), mach, key)
+    def read_fields(self, records, mach='(unknown)', key=None):
+        """Add already-decoded event records (field tuples) for mach."""
+        if key is None: key = mach
+        if not key in self.events_per_machine:
+            self.events_per_machine[key] = []
+        new = [Event.new_from_fields(fields, mach) for fields in records]
+        self.events.extend(new)
+        self.events_per_machine[key].extend(new)
+    def timeline(self, start=None, end=None):
+        """All machines' events in chronological order; see timeline()."""
+        return timeline(self.events_per_machine, start, end)
+    def write_report(self, out, events=None):
+        if events is None: events = self.events
         out.write('Votronic  PEB#   Type    Date       Time     Event\n')
         lastpeb = ''
         lastmach = ''
-        for e in self.events:
+        for e in events:
 
             peb = "%6d  %3s" % (e.pebno, e.pebtype)
             if peb == lastpeb: peb = ''
@@ -199,20 +223,26 @@ class Event(object):
         )
     def codestr(self):
         return Event.CODES[self.eventcode]
-    def unpack(self, buf, machine):
+    def unpack(self, buf, machine, record=ivlayout.DEFAULT.events.record):
+        self.unpack_fields(record.unpack_from(buf), machine)
+    def unpack_fields(self, fields, machine):
         self.machine = machine
-        (self.eventcode, ts, unknown1, self.pebno) = \
-            struct.unpack("<bLbL", buf)
+        (self.eventcode, ts, unknown1, self.pebno) = fields
         self.timestamp = ts + TIMEBASE
         self.time_tuple = time.localtime(self.timestamp)
         self.datetime = time.strftime(time_fmt, self.time_tuple)
         self.pebtype = ('SUP','VTR')[int(self.pebno==0)]
         self.desc = self.codestr()
-    def new_from_buf(buf, machine):
+    def new_from_buf(buf, machine, record=ivlayout.DEFAULT.events.record):
         e = Event.__new__(Event)
-        e.unpack(buf, machine)
+        e.unpack(buf, machine, record)
         return e
     new_from_buf = staticmethod(new_from_buf)
+    def new_from_fields(fields, machine):
+        e = Event.__new__(Event)
+        e.unpack_fields(fields, machine)
+        return e
+    new_from_fields = staticmethod(new_from_fields)
 
     def __eq__(self, him):
         return self.machine == him.machine \
@@ -273,6 +303,39 @@ class Event(object):
             self.timestamp = time.mktime(self.getTimeTuple())
         return self.timestamp
 
+def first_event_at(evts, t):
+    """Index of the first event in the time-ordered list evts whose
+    timestamp is >= t."""
+    lo, hi = 0, len(evts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if evts[mid].getTimestamp() < t: lo = mid + 1
+        else: hi = mid
+    return lo
+
+def timeline(per_machine, start=None, end=None):
+    """Yield the events from every machine in per_machine (machine -> list
+    of events in time order, e.g. events_per_machine) as a single
+    chronological sequence.  The per-machine lists are merged lazily with a
+    heap, so nothing is sorted or copied.  If given, start and end (seconds
+    since the epoch) limit the output to start <= timestamp < end."""
+    heap = []
+    for mach, evts in per_machine.items():
+        i = 0
+        if start is not None: i = first_event_at(evts, start)
+        if i < len(evts):
+            heap.append((evts[i].getTimestamp(), mach, i, evts))
+    heapq.heapify(heap)
+    while heap:
+        (ts, mach, i, evts) = heap[0]
+        if end is not None and ts >= end: break
+        yield evts[i]
+        i += 1
+        if i < len(evts):
+            heapq.heapreplace(heap, (evts[i].getTimestamp(), mach, i, evts))
+        else:
+            heapq.heappop(heap)
+
 def read_event(infile):
     global g_line_no
     for line in infile:
@@ -280,35 +343,83 @@ def read_event(infile):
         evt = Event.parse(line)
         if evt: yield evt
 
-def tabulate(infile):
+def add_event(event):
     global events, events_per_peb, events_per_machine, events_per_code
-    reset()
+    events.append(event)
 
-    for event in read_event(infile):
-        events.append(event)
+    if not event.machine in events_per_machine:
+        events_per_machine[event.machine] = []
+    events_per_machine[event.machine].append(event)
 
-        if not event.machine in events_per_machine:
-            events_per_machine[event.machine] = []
-        events_per_machine[event.machine].append(event)
+    pebspec = (event.pebno, event.pebtype)
+    if not pebspec in events_per_peb:
+        events_per_peb[pebspec] = []
+    events_per_peb[pebspec].append(event)
 
-        pebspec = (event.pebno, event.pebtype)
-        if not pebspec in events_per_peb:
-            events_per_peb[pebspec] = []
-        events_per_peb[pebspec].append(event)
+    events_per_code[event.eventcode] = \
+        events_per_code.get(event.eventcode, 0) + 1
 
-        events_per_code[event.eventcode] = \
-            events_per_code.get(event.eventcode, 0) + 1
+def tabulate(infile):
+    global g_offset
+    reset()
+
+    for event in read_event(infile):
+        add_event(event)
+    # so that a later follow() picks up where this left off
+    try:
+        g_offset = infile.tell()
+    except (AttributeError, IOError):
+        pass
+
+def follow(fn):
+    """Tabulate whatever has been appended to the text event log fn since the
+    last call to follow() (or since tabulate(), if that was given an open
+    file, e.g. tabulate(open(fn)); follow(fn)).  Only the new bytes are read; the current
+    machine/PEB carried forward from the previous chunk is kept, and the new
+    events are added to the existing tallies.  A trailing partial line is
+    left for the next call.  If the file has shrunk (i.e. it was replaced),
+    everything is reset and reparsed.  Returns the number of new events."""
+    global g_offset
+    infile = open(fn, 'rb')
+    infile.seek(0, 2)
+    if infile.tell() < g_offset:
+        reset()
+    infile.seek(g_offset)
+    data = infile.read()
+    infile.close()
+
+    end = data.rfind('\n') + 1
+    count = 0
+    for event in read_event(data[:end].splitlines(True)):
+        add_event(event)
+        count += 1
+    g_offset += end
+    return count
     
 if __name__ == '__main__':
     import sys
 
+    if len(sys.argv) > 2 and sys.argv[1] == '-f':
+        # follow mode: keep tabulating the text log as it grows
+        text_event_log = sys.argv[2]
+        interval = 10
+        if len(sys.argv) > 3: interval = int(sys.argv[3])
+        while True:
+            new = follow(text_event_log)
+            if new:
+                print "%s  +%d events; %d events, %d machines, %d PEBs" % (
+                    time.strftime("%X"), new, len(events),
+                    len(events_per_machine), len(events_per_peb))
+            time.sleep(interval)
+
     if len(sys.argv) > 2:
         text_event_log = sys.argv[1]
         mem_root = sys.argv[2]
     else:
         print "usage: ieventlog.py <eventlog.txt> <root-path>"
+        print "       ieventlog.py -f <eventlog.txt> [<seconds>]"
         print "  <eventlog.txt> : text tabulation of records"
-        print "  <root-path> : ancestor directory of *.BIN files to compare against text"
+        print "  <root-path> : ancestor directory (or .zip/.tar.gz archive) of *.BIN files to compare against text"
         sys.exit(1)
 
     #text_event_log = 'eveventlog.txt'
@@ -352,24 +463,37 @@ if __name__ == '__main__':
     print "-" * 70
 
     #mem_root = "evflash"
-    from rwalk import rwalk
-    import os
+    import ivarchive, ivdedup
     from seqdiff import *
 
     print "Scanning for memories: " + mem_root
     log = EventLog()
 
     machines = []
-    for root, dirs, files in rwalk(mem_root):
-        for fn in files:
-            m = re.match(r'V(.......)\.BIN$', fn)
-            if m:
-                machines.append((os.path.join(root,fn), m.group(1)))
+    if ivarchive.is_archive(mem_root):
+        images, duplicates, conflicts = ivdedup.dedup_digests(
+            list(ivarchive.decode_archive(mem_root, digests=True)))
+        if duplicates or conflicts:
+            print "Skipping %d duplicate images" % len(duplicates)
+            ivdedup.write_report(sys.stdout, duplicates, conflicts)
+
+        images.sort(lambda a,b: cmp(a[1],b[1]))
+        for name, machine, digest, fields, ballots in images:
+            key = ivdedup.image_key(name, machine, conflicts)
+            print "  " + key
+            log.read_fields(fields, machine, key)
+            machines.append((name, machine))
+    else:
+        machines, duplicates, conflicts = ivdedup.dedup(
+            ivdedup.find_images(mem_root))
+        if duplicates or conflicts:
+            print "Skipping %d duplicate images" % len(duplicates)
+            ivdedup.write_report(sys.stdout, duplicates, conflicts)
 
-    machines.sort(lambda a,b: cmp(a[1],b[1]))
-    for path, machine in machines:
-        print "  " + machine
-        log.read_mem(path, machine)
+        for path, machine in machines:
+            key = ivdedup.image_key(path, machine, conflicts)
+            print "  " + key
+            log.read_mem(path, machine, key)
 
     print "%d machines; %d events" % (len(machines), len(log.events))
 
@@ -387,10 +511,14 @@ if __name__ == '__main__':
     for m1, events1 in events_per_machine.items():
         if not m1 in log.events_per_machine:
             print "!!! don't have memory records for machine " + m1
-        else:
-            diffs = seqdiff(events1, log.events_per_machine[m1])
+            continue
+        # conflicting images of the same machine are compared separately
+        keys = [m1] + [ivdedup.image_key(path, m1, conflicts)
+                       for path in conflicts.get(m1, [])[1:]]
+        for key in keys:
+            diffs = seqdiff(events1, log.events_per_machine[key])
             if len(diffs) > 0:
-                print "!!! diffs for machine " + m1
+                print "!!! diffs for machine " + key
                 disc_count += 1
                 for d in diffs:
                     if d.left:
@@ -0,0 +1,190 @@
+# ivarchive.py - part of the Rice iV Drip package
+# Copyright (C) 2026 agent
+#
+# AUTHORS:
+#     agent
+#     agent@local
+# VERSION:
+#     0.1
+# CREATED:
+#     2026-Oct-19
+# LICENSE:
+#     This program is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License along
+#     with this program; if not, write to the Free Software Foundation, Inc.,
+#     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Reads memory images (Vxxxxxxx.BIN) straight out of .zip and .tar[.gz|.bz2]
+archives, without extracting them to disk first.
+
+Only the part of each image that holds the event and ballot regions (see
+ivlayout.py) is read into memory; the rest is skipped, by seeking where the
+archive allows it.  Zip members are decoded in parallel, each worker opening
+the archive itself; tar archives are read in a single pass (they can't be
+read at random without decompressing from the start every time) and the
+decoding is handed out to the workers.
+
+Command-line usage:
+    $ python ivarchive.py <archive> ...
+    Lists the images found in each archive with their event and ballot
+    counts.
+
+Programmatic usage:
+    log = EventLog()
+    for name, machine, events, ballots in decode_archive('county.zip'):
+        log.read_fields(events, machine)
+        bl = BallotLog(machine)
+        bl.ballots = ballots
+"""
+
+import os, re
+import zipfile, tarfile
+import itertools
+import ivlayout, ivdedup
+
+re_image = re.compile(r'V(.......)\.BIN$')
+
+def is_archive(path):
+    return os.path.isfile(path) \
+        and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+def image_machine(name):
+    """The machine ID of an archive member named like Vxxxxxxx.BIN, or
+    None."""
+    m = re_image.match(os.path.basename(name))
+    if m: return m.group(1)
+    return None
+
+def read_image(fp, layout=ivlayout.DEFAULT):
+    """Read the regions of layout from the image in the file-like object fp
+    (positioned at the start of the image).  Returns (buf, base), where base
+    is the file offset of buf[0]."""
+    start, end = layout.span()
+    try:
+        fp.seek(start)
+    except (AttributeError, IOError):
+        # e.g. zip members, which can only be read forwards
+        skip = start
+        while skip > 0:
+            n = len(fp.read(min(skip, 0x10000)))
+            if n == 0: break
+            skip -= n
+    return fp.read(end - start), start
+
+def images(path, layout=ivlayout.DEFAULT):
+    """Yield (member name, machine ID, buf, base) for every Vxxxxxxx.BIN
+    image in the archive, in archive order."""
+    if zipfile.is_zipfile(path):
+        z = zipfile.ZipFile(path)
+        for info in z.infolist():
+            machine = image_machine(info.filename)
+            if machine is None: continue
+            fp = z.open(info)
+            buf, base = read_image(fp, layout)
+            fp.close()
+            yield info.filename, machine, buf, base
+        z.close()
+    else:
+        # stream mode: one sequential pass, transparently decompressed
+        t = tarfile.open(path, 'r|*')
+        for info in t:
+            if not info.isfile(): continue
+            machine = image_machine(info.name)
+            if machine is None: continue
+            buf, base = read_image(t.extractfile(info), layout)
+            yield info.name, machine, buf, base
+        t.close()
+
+def decode_image(buf, base, layout=ivlayout.DEFAULT):
+    """(event field tuples, ballots) decoded from one image buffer."""
+    return (layout.events.decode_all(buf, base),
+            list(layout.ballots.decode(buf, base)))
+
+# ----- workers -----
+# Layouts hold struct.Struct objects, which can't be pickled, so workers are
+# handed the layout name instead.
+
+_zips = {}
+
+def _decode_zip_member(args):
+    path, name, layout_name, digests = args
+    z = _zips.get(path)
+    if z is None:
+        z = _zips[path] = zipfile.ZipFile(path)
+    fp = z.open(name)
+    buf, base = read_image(fp, ivlayout.LAYOUTS[layout_name])
+    fp.close()
+    return _decode_buf((name, image_machine(name), buf, base, layout_name,
+        digests))
+
+def _decode_buf(args):
+    name, machine, buf, base, layout_name, digests = args
+    layout = ivlayout.LAYOUTS[layout_name]
+    events, ballots = decode_image(buf, base, layout)
+    if digests:
+        return name, machine, ivdedup.buf_digest(buf, base, layout), \
+            events, ballots
+    return name, machine, events, ballots
+
+def decode_archive(path, workers=None, layout=ivlayout.DEFAULT,
+        digests=False):
+    """Yield (member name, machine ID, event field tuples, ballots) for
+    every image in the archive, in archive order, decoding them across
+    workers processes (default: one per CPU; 1 means don't fork).  With
+    digests set, yields (member name, machine ID, region digest, event field
+    tuples, ballots) instead, for ivdedup.dedup_digests()."""
+    if zipfile.is_zipfile(path):
+        z = zipfile.ZipFile(path)
+        tasks = [(path, info.filename, layout.name, digests)
+                 for info in z.infolist()
+                 if image_machine(info.filename) is not None]
+        z.close()
+        func = _decode_zip_member
+    else:
+        tasks = ((name, machine, buf, base, layout.name, digests)
+                 for name, machine, buf, base in images(path, layout))
+        func = _decode_buf
+
+    if workers == 1:
+        for result in itertools.imap(func, tasks):
+            yield result
+        return
+
+    import multiprocessing
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers)
+    try:
+        # hand the tasks out a few at a time, so that a tar archive isn't
+        # read into memory faster than the workers can decode it
+        tasks = iter(tasks)
+        while True:
+            batch = list(itertools.islice(tasks, 4 * workers))
+            if not batch: break
+            for result in pool.imap(func, batch):
+                yield result
+    finally:
+        pool.terminate()
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print "usage: ivarchive.py <archive> ..."
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        print path
+        count = 0
+        for name, machine, events, ballots in decode_archive(path):
+            print "  %s  %s: %d events, %d ballots" % (machine, name,
+                len(events), len(ballots))
+            count += 1
+        print "%d images" % count
@@ -0,0 +1,157 @@
+# ivcheck.py - part of the Rice iV Drip package
+# Copyright (C) 2026 agent
+#
+# AUTHORS:
+#     agent
+#     agent@local
+# VERSION:
+#     0.1
+# CREATED:
+#     2026-Oct-19
+# LICENSE:
+#     This program is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License along
+#     with this program; if not, write to the Free Software Foundation, Inc.,
+#     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Cross-checks the two ballot counts available in each memory image
+(Vxxxxxxx.BIN): the "Normal ballot cast" and "Super ballot cast" events in
+the event log, and the ballot records themselves (see BallotLog.py).
+
+Each image is read once; both regions are decoded from the same buffer.
+Images are checked in parallel, one worker process per CPU.
+
+Command-line usage:
+    $ python ivcheck.py <root-path>
+    where <root-path> is an ancestor directory of *.BIN files, or a
+    .zip/.tar.gz archive containing them.
+
+Duplicate copies of an image are checked once (see ivdedup.py); the
+duplicates and any machines with more than one different image are listed
+before the table.
+
+Example output:
+    Votronic  Normal  Super  Ballots
+    5117865      31      6       37
+    5117866      22      0       21  !!! MISMATCH (-1)
+    ...
+    2 images; 1 mismatch
+
+Programmatic usage:
+    for c in check_tree('evflash'):
+        if c.mismatch(): print c.machine, c.path
+"""
+
+import ivlayout, ivarchive, ivdedup
+
+NORMAL_BALLOT = 20 # 'Normal ballot cast'
+SUPER_BALLOT = 21  # 'Super ballot cast'
+
+class Check:
+    def __init__(self, machine, path, events, ballots):
+        self.machine = machine
+        self.path = path
+        self.normal = self.super = 0
+        for fields in events:
+            if fields[0] == NORMAL_BALLOT: self.normal += 1
+            elif fields[0] == SUPER_BALLOT: self.super += 1
+        self.ballots = len(ballots)
+
+    def difference(self):
+        """Ballot records minus ballot-cast events."""
+        return self.ballots - (self.normal + self.super)
+
+    def mismatch(self):
+        return self.difference() != 0
+
+def check_image(path, machine, layout=ivlayout.DEFAULT):
+    fp = open(path, 'rb')
+    buf, base = ivarchive.read_image(fp, layout)
+    fp.close()
+    events, ballots = ivarchive.decode_image(buf, base, layout)
+    return Check(machine, path, events, ballots)
+
+def _check_image(args):
+    path, machine, layout_name = args
+    return check_image(path, machine, ivlayout.LAYOUTS[layout_name])
+
+def check_tree(root, workers=None, layout=ivlayout.DEFAULT, out=None):
+    """Yield a Check for every distinct image under root (a directory or an
+    archive), sorted by machine ID.  The duplicate images skipped and the
+    machines with conflicting images are written to out, if given, before
+    the first Check."""
+    if ivarchive.is_archive(root):
+        images, duplicates, conflicts = ivdedup.dedup_digests(
+            list(ivarchive.decode_archive(root, workers, layout,
+                digests=True)))
+        _write_dedup(out, duplicates, conflicts)
+        checks = [Check(machine, name, events, ballots)
+                  for name, machine, digest, events, ballots in images]
+        checks.sort(lambda a,b: cmp(a.machine,b.machine))
+        for c in checks:
+            yield c
+        return
+
+    images, duplicates, conflicts = ivdedup.dedup(
+        ivdedup.find_images(root), layout)
+    _write_dedup(out, duplicates, conflicts)
+    tasks = [(path, machine, layout.name) for path, machine in images]
+    if workers == 1:
+        for task in tasks:
+            yield _check_image(task)
+        return
+
+    import multiprocessing
+    pool = multiprocessing.Pool(workers)
+    try:
+        for c in pool.imap(_check_image, tasks):
+            yield c
+    finally:
+        pool.terminate()
+
+def _write_dedup(out, duplicates, conflicts):
+    if out is not None and (duplicates or conflicts):
+        out.write("Skipping %d duplicate images\n" % len(duplicates))
+        ivdedup.write_report(out, duplicates, conflicts)
+
+def write_report(out, checks):
+    """Writes one row per image.  If a machine has more than one (distinct)
+    image, its rows also name the image file."""
+    checks = list(checks)
+    per_machine = {}
+    for c in checks:
+        per_machine[c.machine] = per_machine.get(c.machine, 0) + 1
+
+    out.write('Votronic  Normal  Super  Ballots\n')
+    count = mismatches = 0
+    for c in checks:
+        flag = ''
+        if c.mismatch():
+            flag = '  !!! MISMATCH (%+d)' % c.difference()
+            mismatches += 1
+        if per_machine[c.machine] > 1:
+            flag += '  [%s]' % c.path
+        out.write('%7s  %6d  %5d  %7d%s\n'
+            % (c.machine, c.normal, c.super, c.ballots, flag))
+        count += 1
+    out.write('%d images; %d mismatch%s\n'
+        % (count, mismatches, ('es', '')[int(mismatches == 1)]))
+    return mismatches
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print "usage: ivcheck.py <root-path>"
+        print "  <root-path> : ancestor directory (or .zip/.tar.gz archive) of *.BIN files"
+        sys.exit(1)
+    if write_report(sys.stdout, check_tree(sys.argv[1], out=sys.stdout)):
+        sys.exit(2)
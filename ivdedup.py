@@ -0,0 +1,178 @@
+# ivdedup.py - part of the Rice iV Drip package
+# Copyright (C) 2026 agent
+#
+# AUTHORS:
+#     agent
+#     agent@local
+# VERSION:
+#     0.1
+# CREATED:
+#     2026-Oct-19
+# LICENSE:
+#     This program is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License along
+#     with this program; if not, write to the Free Software Foundation, Inc.,
+#     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Finds duplicate copies of memory images (Vxxxxxxx.BIN) in a directory
+tree -- backups, re-dumps, symlinked mirrors -- so each image is parsed only
+once, and reports machines that have more than one *different* image.
+
+Paths that resolve to the same file are duplicates outright.  Otherwise only
+machines with more than one image are looked at further: their images are
+compared by a SHA-1 digest of just the event and ballot regions (see
+ivlayout.py), so copies that differ only outside those regions, or in
+length, still count as duplicates.
+
+Command-line usage:
+    $ python ivdedup.py <root-path>
+
+Programmatic usage:
+    unique, duplicates, conflicts = dedup(find_images(root))
+    for path, machine in unique:
+        log.read_mem(path, machine, image_key(path, machine, conflicts))
+
+For archives (see ivarchive.py), get the digests along with the decoded
+images and use dedup_digests():
+    unique, duplicates, conflicts = dedup_digests(
+        list(decode_archive(path, digests=True)))
+"""
+
+import os, re
+import hashlib
+import ivlayout
+from rwalk import rwalk
+
+def find_images(root):
+    """(path, machine ID) of every Vxxxxxxx.BIN file under root, sorted by
+    machine ID."""
+    images = []
+    for dirpath, dirs, files in rwalk(root):
+        for fn in files:
+            m = re.match(r'V(.......)\.BIN$', fn)
+            if m:
+                images.append((os.path.join(dirpath, fn), m.group(1)))
+    images.sort(lambda a,b: cmp(a[1],b[1]))
+    return images
+
+def region_digest(fn, layout=ivlayout.DEFAULT):
+    """SHA-1 (hex) of the event and ballot regions of an image."""
+    fp = open(fn, 'rb')
+    h = hashlib.sha1()
+    h.update(layout.events.read(fp))
+    h.update(layout.ballots.read(fp))
+    fp.close()
+    return h.hexdigest()
+
+def buf_digest(buf, base=0, layout=ivlayout.DEFAULT):
+    """Same as region_digest(), for an image already in memory (buf holds
+    the image starting at file offset base)."""
+    events, ballots = layout.events, layout.ballots
+    h = hashlib.sha1()
+    h.update(buf[events.offset - base:events.offset + events.length - base])
+    h.update(buf[ballots.start - base:ballots.end - base])
+    return h.hexdigest()
+
+def dedup(images, layout=ivlayout.DEFAULT):
+    """Given a list of (path, machine ID), returns (unique, duplicates,
+    conflicts):
+        unique     : the (path, machine ID) pairs to parse, in input order
+        duplicates : (path, machine ID, path of the copy kept) for each
+                     image that was skipped
+        conflicts  : machine ID -> paths of its distinct images, for
+                     machines with more than one
+    """
+    # symlinks and the like: same file, different path
+    real = {}
+    candidates = []
+    duplicates = []
+    for path, machine in images:
+        key = (os.path.realpath(path), machine)
+        if key in real:
+            duplicates.append((path, machine, real[key]))
+        else:
+            real[key] = path
+            candidates.append((path, machine))
+
+    per_machine = {}
+    for path, machine in candidates:
+        per_machine[machine] = per_machine.get(machine, 0) + 1
+
+    entries = []
+    for path, machine in candidates:
+        if per_machine[machine] == 1:
+            # nothing to compare with; don't bother reading it
+            entries.append((path, machine, None))
+        else:
+            entries.append((path, machine, region_digest(path, layout)))
+    unique, more, conflicts = dedup_digests(entries)
+    return [entry[:2] for entry in unique], duplicates + more, conflicts
+
+def dedup_digests(entries):
+    """Like dedup(), for images whose region digests are already known:
+    entries are tuples starting with (name, machine ID, digest), and a
+    digest of None means the image is unique.  Returns (unique, duplicates,
+    conflicts), where unique is the list of entries to keep."""
+    unique = []
+    duplicates = []
+    kept = {}
+    conflicts = {}
+    for entry in entries:
+        (name, machine, digest) = entry[:3]
+        if digest is None:
+            unique.append(entry)
+            continue
+        key = (machine, digest)
+        if key in kept:
+            duplicates.append((name, machine, kept[key]))
+        else:
+            kept[key] = name
+            unique.append(entry)
+            conflicts.setdefault(machine, []).append(name)
+
+    for machine in conflicts.keys():
+        if len(conflicts[machine]) < 2:
+            del conflicts[machine]
+    return unique, duplicates, conflicts
+
+def image_key(name, machine, conflicts):
+    """The key to file an image's data under: its machine ID, except for
+    the second and later of a machine's conflicting images, which get
+    'machine:name' so their data isn't mixed in with the first image's."""
+    names = conflicts.get(machine)
+    if not names or names[0] == name:
+        return machine
+    return '%s:%s' % (machine, name)
+
+def write_report(out, duplicates, conflicts):
+    for path, machine, orig in duplicates:
+        out.write("  duplicate: %s (same as %s)\n" % (path, orig))
+    machines = conflicts.keys()
+    machines.sort()
+    for machine in machines:
+        out.write("  !!! %d different images for machine %s:\n"
+            % (len(conflicts[machine]), machine))
+        for path in conflicts[machine]:
+            out.write("        %s\n" % path)
+        out.write("      using %s as %s; the others are filed as %s:<path>\n"
+            % (conflicts[machine][0], machine, machine))
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print "usage: ivdedup.py <root-path>"
+        sys.exit(1)
+    images = find_images(sys.argv[1])
+    unique, duplicates, conflicts = dedup(images)
+    print "%d images, %d unique, %d duplicates, %d conflicting machines" \
+        % (len(images), len(unique), len(duplicates), len(conflicts))
+    write_report(sys.stdout, duplicates, conflicts)
@@ -0,0 +1,232 @@
+# ivlayout.py - part of the Rice iV Drip package
+# Copyright (C) 2026 agent
+#
+# AUTHORS:
+#     agent
+#     agent@local
+# VERSION:
+#     0.1
+# CREATED:
+#     2026-Oct-19
+# LICENSE:
+#     This program is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License along
+#     with this program; if not, write to the Free Software Foundation, Inc.,
+#     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Declarative description of the regions and records in iVotronic(TM)-style
+memory images (.BIN), shared by the event log and ballot decoders.
+
+Each record type is declared once as a list of (field name, struct code)
+pairs and compiled into a struct.Struct (and, if NumPy is installed, a
+matching dtype, which is used to decode the fixed-size event records in
+bulk; ballot records vary in length and are always decoded with struct).
+A firmware variant with a different layout is just another ImageLayout
+entry in LAYOUTS.
+
+Usage:
+    layout = ivlayout.DEFAULT
+    fp = open('VXXXXXXX.BIN', 'rb')
+    for fields in layout.events.decode(layout.events.read(fp),
+                                       layout.events.offset):
+        # ... fields is (eventcode, timestamp, unknown1, pebno) ...
+    for votes in layout.ballots.decode(layout.ballots.read(fp),
+                                       layout.ballots.start):
+        # ... votes is a list of 0-indexed candidate IDs ...
+
+The decoders take a buffer together with the file offset of its first byte
+(base), so they work equally well on a single region read with read() or on
+an entire image already in memory (base 0).
+"""
+
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# struct codes -> NumPy type strings (all records are little-endian)
+NUMPY_CODES = {
+    'b': 'i1', 'B': 'u1',
+    'h': '<i2', 'H': '<u2',
+    'i': '<i4', 'I': '<u4',
+    'l': '<i4', 'L': '<u4',
+}
+
+class Record:
+    """A fixed-size little-endian record made of (name, struct code)
+    fields."""
+    def __init__(self, fields):
+        self.fields = fields
+        self.names = [name for name, code in fields]
+        self.format = '<' + ''.join([code for name, code in fields])
+        self.struct = struct.Struct(self.format)
+        self.size = self.struct.size
+        self.unpack_from = self.struct.unpack_from
+        self._dtype = None
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def dtype(self):
+        """The NumPy dtype equivalent to this record (requires NumPy)."""
+        if self._dtype is None:
+            if numpy is None:
+                raise ImportError('NumPy is required for record dtypes')
+            types = []
+            for name, code in self.fields:
+                if code.endswith('s'):
+                    types.append((name, 'S' + (code[:-1] or '1')))
+                else:
+                    types.append((name, NUMPY_CODES[code]))
+            self._dtype = numpy.dtype(types)
+        return self._dtype
+
+class EventRegion:
+    """A run of fixed-size event records starting at offset, ended by a
+    record whose first byte is end_marker."""
+    def __init__(self, offset, length, record, end_marker='\xff'):
+        self.offset = offset
+        self.length = length
+        self.record = record
+        self.end_marker = end_marker
+
+    def read(self, fp):
+        fp.seek(self.offset)
+        return fp.read(self.length)
+
+    def decode(self, buf, base=0):
+        """Yield the field tuples of the event records in buf."""
+        size = self.record.size
+        unpack_from = self.record.unpack_from
+        pos = self.offset - base
+        end = min(len(buf), pos + self.length)
+        while pos + size <= end and buf[pos] != self.end_marker:
+            yield unpack_from(buf, pos)
+            pos += size
+
+    def decode_all(self, buf, base=0):
+        """List of the field tuples of the event records in buf, decoded in
+        bulk through decode_array() if NumPy is available."""
+        if numpy is not None:
+            return self.decode_array(buf, base).tolist()
+        return list(self.decode(buf, base))
+
+    def decode_array(self, buf, base=0):
+        """Decode the event records in buf into a NumPy record array in one
+        go (requires NumPy)."""
+        dtype = self.record.dtype()
+        pos = self.offset - base
+        end = min(len(buf), pos + self.length)
+        count = max(0, (end - pos) // dtype.itemsize)
+        if count == 0:
+            return numpy.zeros(0, dtype)
+        a = numpy.frombuffer(buf, dtype, count, pos)
+        first = numpy.frombuffer(buf, 'u1', count * dtype.itemsize, pos)
+        done = numpy.nonzero(
+            first[::dtype.itemsize] == ord(self.end_marker))[0]
+        if len(done):
+            a = a[:done[0]]
+        return a
+
+class BallotRegion:
+    """Variable-length ballot records stored in buckets of stride bytes
+    between start and end.  Each record begins with a header whose first
+    field is the record length (including the header) and which contains a
+    num_votes field; the votes follow the header.  A length equal to
+    end_marker ends the bucket."""
+    def __init__(self, start, end, stride, header, vote_code='H',
+            end_marker=0xffff):
+        self.start = start
+        self.end = end
+        self.stride = stride
+        self.header = header
+        self.prefix = Record(header.fields[:1])
+        self.num_votes = header.index('num_votes')
+        self.vote_code = vote_code
+        self.end_marker = end_marker
+        self._votes = {}
+
+    def votes(self, n):
+        """The (cached) struct.Struct for a run of n votes."""
+        s = self._votes.get(n)
+        if s is None:
+            s = self._votes[n] = struct.Struct('<%d%s' % (n, self.vote_code))
+        return s
+
+    def read(self, fp):
+        fp.seek(self.start)
+        return fp.read(self.end - self.start)
+
+    def decode(self, buf, base=0):
+        """Yield each ballot in buf as a list of 0-indexed candidate IDs."""
+        prefix = self.prefix.unpack_from
+        header = self.header.unpack_from
+        hsize = self.header.size
+        psize = self.prefix.size
+        num_votes = self.num_votes
+        for bucket_pos in range(self.start, self.end, self.stride):
+            pos = bucket_pos - base
+            while pos + psize <= len(buf):
+                record_len = prefix(buf, pos)[0]
+                if record_len == self.end_marker or record_len < psize:
+                    break
+                if pos + hsize > len(buf):
+                    break # truncated image
+                n = header(buf, pos)[num_votes]
+                votes = self.votes(n)
+                if pos + hsize + votes.size > len(buf):
+                    break
+                yield list(votes.unpack_from(buf, pos + hsize))
+                pos += record_len
+
+class ImageLayout:
+    def __init__(self, name, events, ballots):
+        self.name = name
+        self.events = events
+        self.ballots = ballots
+
+    def span(self):
+        """(start, end) file offsets covering every region in the image."""
+        return (min(self.events.offset, self.ballots.start),
+                max(self.events.offset + self.events.length, self.ballots.end))
+
+# Format discovered by Bryce Eakin, Nov. 2006.
+IVOTRONIC = ImageLayout('ivotronic',
+    events = EventRegion(
+        offset = 0x30000,
+        length = 0x20000, # up to the first ballot bucket
+        record = Record([
+            ('eventcode', 'b'),
+            ('timestamp', 'L'), # seconds since 01/01/94 00:00:00
+            ('unknown1', 'b'),
+            ('pebno', 'L'),
+        ])),
+    ballots = BallotRegion(
+        # 26 buckets offset by 0x10000 starting at 0x50000
+        start = 0x50000, end = 0x1f0000, stride = 0x10000,
+        header = Record([
+            # Record length (2 bytes): length of ballot (including the 2
+            # length bytes); this will include a lot of garbage in
+            # addition to individual votes
+            ('length', 'H'),
+            ('unknown', '9s'),
+            ('num_votes', 'H'),
+        ])),
+)
+
+LAYOUTS = {
+    'ivotronic': IVOTRONIC,
+}
+
+DEFAULT = IVOTRONIC
@@ -30,7 +30,9 @@ Currently generates a (long) report of all candidates and the number of votes
 they received, by precinct.  
 
 Command-line usage:
-    $ python ivotelog.py <imagelog.txt>
+    $ python ivotelog.py <imagelog.txt> [<matrix.csv>]
+    If <matrix.csv> is given, the precinct x candidate vote counts are also
+    written there as CSV.
 
 Example output:
     PRECINCT 458 (46 voters)
@@ -44,7 +46,10 @@ Example output:
        [...]
 
 Programmatic usage:
-    Don't try.  (Yet.)
+    tabulate(open('imagelog.txt'))
+    p = pivot()
+    # ... p.precinct('458') ... p.matrix ... p.machine_matrix ...
+    p.write_csv(open('matrix.csv', 'wb'))
 """
 
 import re
@@ -149,11 +154,80 @@ def tabulate(infile):
         get_office(race).vote(vin)
         if star == "*": # means a new ballot
             precincts[current_precinct].vote()
+
+class Pivot:
+    """Dense count matrices built from the tallies in one pass: precinct x
+    candidate and machine x candidate, with candidates (columns) in slot
+    order and precincts/machines (rows) sorted, plus per-office totals."""
+    def __init__(self, candidates, offices, precincts):
+        self.candidates = candidates.values()
+        self.candidates.sort(lambda a,b: cmp(a.slot,b.slot))
+        self.precincts = precincts.keys()
+        self.precincts.sort()
+        self.voters = [precincts[pct].voters for pct in self.precincts]
+        self.precinct_row = dict(zip(self.precincts,
+            range(len(self.precincts))))
+
+        machines = {}
+        for cand in self.candidates:
+            for mach in cand.machine_totals:
+                machines[mach] = True
+        self.machines = machines.keys()
+        self.machines.sort()
+        self.machine_row = dict(zip(self.machines,
+            range(len(self.machines))))
+
+        ncand = len(self.candidates)
+        self.matrix = [[0] * ncand for pct in self.precincts]
+        self.machine_matrix = [[0] * ncand for mach in self.machines]
+        for col in range(ncand):
+            cand = self.candidates[col]
+            for pct, n in cand.precinct_totals.items():
+                row = self.precinct_row.get(pct)
+                if row is not None:
+                    self.matrix[row][col] = n
+            for mach, n in cand.machine_totals.items():
+                self.machine_matrix[self.machine_row[mach]][col] = n
+
+        self.offices = offices.keys()
+        self.offices.sort()
+        self.office_totals = [offices[name].total for name in self.offices]
+
+    def precinct(self, pct):
+        """Per-candidate counts for one precinct, in column order."""
+        return self.matrix[self.precinct_row[pct]]
+
+    def machine(self, mach):
+        """Per-candidate counts for one machine, in column order."""
+        return self.machine_matrix[self.machine_row[mach]]
+
+    def write_report(self, out):
+        for row in range(len(self.precincts)):
+            out.write("=============\nPRECINCT %s (%d voters)\n"
+                % (self.precincts[row], self.voters[row]))
+            out.write("CAND VOTES\n")
+            counts = self.matrix[row]
+            for col in range(len(self.candidates)):
+                out.write("%4s %5d\n" % (self.candidates[col].slot,
+                    counts[col]))
+
+    def write_csv(self, out):
+        import csv
+        w = csv.writer(out)
+        w.writerow(['precinct', 'voters'] +
+            ['%s %s - %s' % (c.slot.strip(), c.name.strip(), c.office)
+             for c in self.candidates])
+        for row in range(len(self.precincts)):
+            w.writerow([self.precincts[row], self.voters[row]]
+                + self.matrix[row])
+
+def pivot():
+    return Pivot(candidates, offices, precincts)
     
 if __name__ == '__main__':
     import sys
     if len(sys.argv) < 2:
-        print "usage: ivotelog.py <imagelog.txt>"
+        print "usage: ivotelog.py <imagelog.txt> [<matrix.csv>]"
         sys.exit(1)
     print "Reading and tabulating..."
     tabulate(open(sys.argv[1]))
@@ -166,16 +240,9 @@ if __name__ == '__main__':
         print "%6d | %3s %-30s %s" % (info.total, info.slot, info.name, info.office)
 
     print "\n== Precinct totals (%d precincts) ==" % len(precincts)
-    pcts = precincts.keys()
-    pcts.sort()
-    for pct in pcts:
-        pct_voters = 0
-        print "=============\nPRECINCT %s (%d voters)" \
-            % (pct, precincts[pct].voters)
-        print "CAND VOTES"
-        cands = candidates.values()
-        cands.sort(lambda a,b: cmp(a.slot,b.slot))
-        for info in cands:
-            cand_votes = info.precinct_totals.get(pct,0)
-            pct_voters += cand_votes
-            print "%4s %5d" % (info.slot, cand_votes)
+    p = pivot()
+    p.write_report(sys.stdout)
+
+    if len(sys.argv) > 2:
+        p.write_csv(open(sys.argv[2], 'wb'))
+        print "Wrote precinct x candidate matrix to " + sys.argv[2]
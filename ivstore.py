@@ -0,0 +1,296 @@
+# ivstore.py - part of the Rice iV Drip package
+# Copyright (C) 2026 agent
+#
+# AUTHORS:
+#     agent
+#     agent@local
+# VERSION:
+#     0.1
+# CREATED:
+#     2026-Oct-19
+# LICENSE:
+#     This program is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License along
+#     with this program; if not, write to the Free Software Foundation, Inc.,
+#     51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Bulk loader that stores parsed event logs, ballots and vote tallies in a
+SQLite database, so that ad-hoc questions can be answered with SQL instead of
+reparsing the original logs every time.
+
+Rows are inserted with executemany() inside one transaction per machine.  On
+the initial load the indexes are built only after the load is finished; when
+appending to an existing database they are kept, and loading a machine that
+is already there replaces its rows (found through the machine indexes).
+
+Command-line usage:
+    $ python ivstore.py [-e <eventlog.txt>] [-i <imagelog.txt>] <db> [<root-path> ...]
+    where:
+        <db>            : SQLite database file (created if missing)
+        <eventlog.txt>  : text tabulation of event records
+        <imagelog.txt>  : text tabulation of ballot records (see ivotelog.py)
+        <root-path>     : ancestor directory of *.BIN files, or a
+                          .zip/.tar.gz archive of them
+
+Programmatic usage:
+    store = Store('county.db')
+    store.begin()
+    store.add_events(log.events_per_machine['XXXXXXX'], 'XXXXXXX', 'mem')
+    store.add_ballots(bl)
+    store.finish()
+
+Tables:
+    events             (machine, source, seq, timestamp, eventcode, pebno,
+                        pebtype)
+    ballots            (machine, ballot, num_votes)
+    votes              (machine, ballot, candidate)
+    candidate_machine  (machine, slot, name, office, votes)
+    candidate_precinct (precinct, slot, name, office, votes)
+    office_machine     (machine, office, votes)
+    precincts          (precinct, voters)
+
+Candidate numbers in the votes table start from 1, like the printed output
+of BallotLog.py and the candidate slots in the text ballot log.
+
+Duplicate copies of an image are loaded once (see ivdedup.py).  If a machine
+has several different images, the first is stored under the machine ID and
+the others under 'machine:path', so none of them is lost.
+"""
+
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    machine TEXT, source TEXT, seq INTEGER, timestamp INTEGER,
+    eventcode INTEGER, pebno INTEGER, pebtype TEXT);
+CREATE TABLE IF NOT EXISTS ballots (
+    machine TEXT, ballot INTEGER, num_votes INTEGER);
+CREATE TABLE IF NOT EXISTS votes (
+    machine TEXT, ballot INTEGER, candidate INTEGER);
+CREATE TABLE IF NOT EXISTS candidate_machine (
+    machine TEXT, slot INTEGER, name TEXT, office TEXT, votes INTEGER);
+CREATE TABLE IF NOT EXISTS candidate_precinct (
+    precinct TEXT, slot INTEGER, name TEXT, office TEXT, votes INTEGER);
+CREATE TABLE IF NOT EXISTS office_machine (
+    machine TEXT, office TEXT, votes INTEGER);
+CREATE TABLE IF NOT EXISTS precincts (
+    precinct TEXT, voters INTEGER);
+"""
+
+INDEXES = [
+    ('idx_events_machine', 'events', 'machine, source, seq'),
+    ('idx_events_code', 'events', 'eventcode, machine'),
+    ('idx_ballots_machine', 'ballots', 'machine, ballot'),
+    ('idx_votes_machine', 'votes', 'machine, ballot'),
+    ('idx_votes_candidate', 'votes', 'candidate, machine'),
+    ('idx_candidate_machine', 'candidate_machine', 'machine, slot'),
+    ('idx_candidate_precinct', 'candidate_precinct', 'precinct, slot'),
+    ('idx_office_machine', 'office_machine', 'machine, office'),
+    ('idx_precincts', 'precincts', 'precinct'),
+]
+
+class Store:
+    def __init__(self, fn):
+        self.db = sqlite3.connect(fn)
+        self.db.text_factory = str
+        self.db.executescript(SCHEMA)
+
+    def begin(self):
+        """Drop the indexes on tables that are still empty before a bulk
+        load; finish() puts them back.  Tables that already hold data keep
+        their indexes, since replacing a machine's rows needs them."""
+        for name, table, cols in INDEXES:
+            if self.db.execute('SELECT 1 FROM %s LIMIT 1' % table) \
+                    .fetchone() is None:
+                self.db.execute('DROP INDEX IF EXISTS %s' % name)
+        self.db.commit()
+
+    def finish(self):
+        """(Re)build any indexes that are missing."""
+        for name, table, cols in INDEXES:
+            self.db.execute('CREATE INDEX IF NOT EXISTS %s ON %s (%s)'
+                % (name, table, cols))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def add_events(self, events, machine, source):
+        """Store the events for one machine, replacing whatever was
+        previously loaded for that machine from the same source ('text' for
+        the text event log, 'mem' for .BIN images)."""
+        def rows():
+            seq = 0
+            for e in events:
+                yield (machine, source, seq, int(e.getTimestamp()),
+                    e.eventcode, str(e.pebno).strip(), e.pebtype)
+                seq += 1
+        db = self.db
+        db.execute('DELETE FROM events WHERE machine = ? AND source = ?',
+            (machine, source))
+        db.executemany('INSERT INTO events VALUES (?,?,?,?,?,?,?)', rows())
+        db.commit()
+
+    def add_event_log(self, events_per_machine, source):
+        """Store every machine from an events_per_machine dictionary (either
+        EventLog.events_per_machine or ieventlog.events_per_machine)."""
+        for machine, events in events_per_machine.items():
+            self.add_events(events, machine, source)
+
+    def add_ballots(self, bl):
+        """Store the ballots decoded into a BallotLog, replacing any ballots
+        previously loaded for bl.machine_id."""
+        machine = bl.machine_id
+        def ballot_rows():
+            for i in range(len(bl.ballots)):
+                yield (machine, i, len(bl.ballots[i]))
+        def vote_rows():
+            for i in range(len(bl.ballots)):
+                for vote in bl.ballots[i]:
+                    yield (machine, i, 1 + vote)
+        db = self.db
+        db.execute('DELETE FROM ballots WHERE machine = ?', (machine,))
+        db.execute('DELETE FROM votes WHERE machine = ?', (machine,))
+        db.executemany('INSERT INTO ballots VALUES (?,?,?)', ballot_rows())
+        db.executemany('INSERT INTO votes VALUES (?,?,?)', vote_rows())
+        db.commit()
+
+    def add_tallies(self, candidates, offices, precincts):
+        """Store the tallies built by ivotelog.tabulate() (pass in
+        ivotelog.candidates, ivotelog.offices and ivotelog.precincts).
+        Machines and precincts that appear in the new tallies replace any
+        rows previously stored for them."""
+        machines = {}
+        for cand in candidates.values():
+            for machine in cand.machine_totals:
+                machines[machine] = True
+        pcts = {}
+        for cand in candidates.values():
+            for pct in cand.precinct_totals:
+                pcts[pct] = True
+        for pct in precincts:
+            pcts[pct] = True
+
+        def candidate_machine_rows():
+            for cand in candidates.values():
+                for machine, n in cand.machine_totals.items():
+                    yield (machine, cand.slot.strip(), cand.name.strip(),
+                        cand.office, n)
+        def candidate_precinct_rows():
+            for cand in candidates.values():
+                for pct, n in cand.precinct_totals.items():
+                    yield (pct, cand.slot.strip(), cand.name.strip(),
+                        cand.office, n)
+        def office_machine_rows():
+            for office in offices.values():
+                for machine, n in office.machine_totals.items():
+                    yield (machine, office.name, n)
+        def precinct_rows():
+            for pct in precincts.values():
+                yield (pct.name, pct.voters)
+
+        db = self.db
+        for machine in machines:
+            db.execute('DELETE FROM candidate_machine WHERE machine = ?',
+                (machine,))
+            db.execute('DELETE FROM office_machine WHERE machine = ?',
+                (machine,))
+        for pct in pcts:
+            db.execute('DELETE FROM candidate_precinct WHERE precinct = ?',
+                (pct,))
+            db.execute('DELETE FROM precincts WHERE precinct = ?', (pct,))
+        db.executemany('INSERT INTO candidate_machine VALUES (?,?,?,?,?)',
+            candidate_machine_rows())
+        db.executemany('INSERT INTO candidate_precinct VALUES (?,?,?,?,?)',
+            candidate_precinct_rows())
+        db.executemany('INSERT INTO office_machine VALUES (?,?,?)',
+            office_machine_rows())
+        db.executemany('INSERT INTO precincts VALUES (?,?)',
+            precinct_rows())
+        db.commit()
+
+if __name__ == '__main__':
+    import sys, getopt
+    import ieventlog, ivotelog, ivarchive, ivdedup
+    from ieventlog import EventLog
+    from BallotLog import BallotLog
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'e:i:')
+    except getopt.GetoptError:
+        args = []
+    if len(args) < 1:
+        print "usage: ivstore.py [-e <eventlog.txt>] [-i <imagelog.txt>] <db> [<root-path> ...]"
+        print "  <db> : SQLite database file (created if missing)"
+        print "  <eventlog.txt> : text tabulation of event records"
+        print "  <imagelog.txt> : text tabulation of ballot records"
+        print "  <root-path> : ancestor directory (or .zip/.tar.gz archive) of *.BIN files"
+        sys.exit(1)
+
+    store = Store(args[0])
+    store.begin()
+
+    for opt, val in opts:
+        if opt == '-e':
+            print "Reading and tabulating: " + val
+            ieventlog.tabulate(open(val))
+            store.add_event_log(ieventlog.events_per_machine, 'text')
+            print "  %d events, %d machines" % (len(ieventlog.events),
+                len(ieventlog.events_per_machine))
+        elif opt == '-i':
+            print "Reading and tabulating: " + val
+            ivotelog.tabulate(open(val))
+            store.add_tallies(ivotelog.candidates, ivotelog.offices,
+                ivotelog.precincts)
+            print "  %d vote items, %d candidates" % (ivotelog.votes,
+                len(ivotelog.candidates))
+
+    def store_image(key, fields, ballots):
+        print "  " + key
+        log = EventLog()
+        log.read_fields(fields, key)
+        store.add_events(log.events, key, 'mem')
+        bl = BallotLog(machine_id = key)
+        bl.ballots = ballots
+        store.add_ballots(bl)
+
+    for mem_root in args[1:]:
+        print "Scanning for memories: " + mem_root
+        if ivarchive.is_archive(mem_root):
+            images, duplicates, conflicts = ivdedup.dedup_digests(
+                list(ivarchive.decode_archive(mem_root, digests=True)))
+            if duplicates or conflicts:
+                print "Skipping %d duplicate images" % len(duplicates)
+                ivdedup.write_report(sys.stdout, duplicates, conflicts)
+            for name, machine, digest, fields, ballots in images:
+                store_image(ivdedup.image_key(name, machine, conflicts),
+                    fields, ballots)
+            continue
+
+        images, duplicates, conflicts = ivdedup.dedup(
+            ivdedup.find_images(mem_root))
+        if duplicates or conflicts:
+            print "Skipping %d duplicate images" % len(duplicates)
+            ivdedup.write_report(sys.stdout, duplicates, conflicts)
+        for path, machine in images:
+            # one read per image for both the events and the ballots
+            fp = open(path, 'rb')
+            buf, base = ivarchive.read_image(fp)
+            fp.close()
+            fields, ballots = ivarchive.decode_image(buf, base)
+            store_image(ivdedup.image_key(path, machine, conflicts),
+                fields, ballots)
+
+    print "Building indexes..."
+    store.finish()
+    store.close()
+    print "Done."